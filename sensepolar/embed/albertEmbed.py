@@ -1,6 +1,9 @@
+import contextlib
+import os
+from functools import lru_cache
+
 from transformers import AlbertTokenizerFast, AlbertModel
 import torch
-import numpy as np
 
 class ALBERTWordEmbeddings:
     """
@@ -19,9 +22,14 @@ class ALBERTWordEmbeddings:
         Takes an encoded sentence and returns the hidden states of the model.
     get_word_embedding(sentence, word)
         Takes a sentence and a word and returns the word embedding of that word in the sentence.
+    get_word_embeddings_batch(pairs)
+        Takes a list of (sentence, word) pairs and returns the word embeddings in one model forward.
+    precompute_encodings(sentences)
+        Tokenizes many sentences in parallel across cores and returns the encodings.
     """
 
-    def __init__(self, model_name='albert-base-v2', layer=2, avg_layers=False):
+    def __init__(self, model_name='albert-base-v2', layer=2, avg_layers=False, device='cpu', dtype=None,
+                 quantize=False, use_jit=False, use_compile=False, use_cuda_graphs=False):
         """
         Initializes an ALBERT fast tokenizer and model object.
 
@@ -29,13 +37,58 @@ class ALBERTWordEmbeddings:
         -----------
         model_name : str, optional
             The name of the ALBERT model to be used for generating embeddings, by default 'albert-base-v1'
+        device : str, optional
+            The device to run the model on, by default 'cpu'.
+        dtype : torch.dtype, optional
+            If set (e.g. torch.bfloat16), the model forward runs under autocast in that dtype.
+            By default None, i.e. full FP32.
+        quantize : bool, optional
+            If True, applies INT8 dynamic quantization to the Linear layers of the model.
+            Only benefits CPU inference, by default False.
+        use_jit : bool, optional
+            If True, traces the model once and freezes it with
+            torch.jit.optimize_for_inference, by default False.
+        use_compile : bool, optional
+            If True, wraps the model with torch.compile(mode="reduce-overhead")
+            and warms it up once, by default False.
+        use_cuda_graphs : bool, optional
+            If True and the device is CUDA, captures the single-sentence forward
+            into per-length-bucket CUDA Graphs and replays them, by default False.
         """
         self.model_name = model_name
         self.layer = layer
         self.avg_layers = avg_layers
+        self.device = device
+        self.dtype = dtype
         self.tokenizer = AlbertTokenizerFast.from_pretrained(model_name)
-        self.model = AlbertModel.from_pretrained(model_name, output_hidden_states=True)
+        self.model = AlbertModel.from_pretrained(model_name, output_hidden_states=avg_layers)
+        if not avg_layers and layer > 1:
+            # ALBERT shares weights across encoder iterations, so skipping the last
+            # (layer - 1) iterations makes last_hidden_state equal to the full
+            # model's hidden_states[-layer] without materializing all layers.
+            self.model.config.num_hidden_layers -= (layer - 1)
+        self.model.to(device)
         self.model.eval()
+        for p in self.model.parameters():
+            p.requires_grad_(False)
+        if quantize:
+            self.model = torch.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8)
+        self.use_jit = use_jit
+        if use_jit:
+            enc = self.tokenizer("a b c", return_tensors="pt", return_token_type_ids=False).to(device)
+            traced = torch.jit.trace(self.model, (enc['input_ids'], enc['attention_mask']), strict=False)
+            self.model = torch.jit.optimize_for_inference(torch.jit.freeze(traced.eval()))
+        elif use_compile:
+            self.model = torch.compile(self.model, mode="reduce-overhead", dynamic=True)
+            enc = self.tokenizer("a b c", return_tensors="pt", return_token_type_ids=False).to(device)
+            with torch.inference_mode():
+                self.model(**enc)
+        # graphs only cover the eager single-sentence last-layer path; the
+        # reduce-overhead compile wrapper manages its own CUDA-graph trees, so
+        # nesting a manual capture inside it would fail
+        self.use_cuda_graphs = (use_cuda_graphs and not use_jit and not use_compile
+                                and not avg_layers and torch.device(device).type == 'cuda')
+        self._graphs = {}
 
     def get_hidden_states(self, encoded):
         """
@@ -51,11 +104,87 @@ class ALBERTWordEmbeddings:
         states : tuple
             A tuple containing the hidden states of the model.
         """
-        with torch.no_grad():
-            output = self.model(**encoded)
-        states = output.hidden_states
+        # move the CPU-tokenized tensors over explicitly (non_blocking overlaps the
+        # H2D copy with preceding GPU work) instead of paying an implicit synchronous
+        # copy inside the model forward
+        encoded = {k: v.to(self.device, non_blocking=True) for k, v in encoded.items()}
+        autocast = (torch.autocast(device_type=torch.device(self.device).type, dtype=self.dtype)
+                    if self.dtype is not None else contextlib.nullcontext())
+        with torch.inference_mode(), autocast:
+            if self.use_cuda_graphs and encoded['input_ids'].shape[0] == 1:
+                states = (self._replay_graph(encoded['input_ids'], encoded['attention_mask']),)
+            elif self.use_jit:
+                output = self.model(encoded['input_ids'], encoded['attention_mask'])
+                states = output['hidden_states'] if self.avg_layers else (output['last_hidden_state'],)
+            else:
+                output = self.model(**encoded)
+                states = output.hidden_states if self.avg_layers else (output.last_hidden_state,)
         return states
 
+    def _replay_graph(self, input_ids, attention_mask):
+        """
+        Runs the forward through a CUDA Graph captured for the matching sequence-length
+        bucket, replacing per-call kernel launches with a single graph replay.
+        """
+        seq_len = input_ids.shape[1]
+        bucket = max(16, 1 << (seq_len - 1).bit_length())
+        pad_id = self.tokenizer.pad_token_id
+        if bucket not in self._graphs:
+            static_ids = torch.full((1, bucket), pad_id, dtype=torch.long, device=self.device)
+            static_mask = torch.zeros((1, bucket), dtype=torch.long, device=self.device)
+            # warm-up forward allocates workspaces outside the capture
+            self.model(input_ids=static_ids, attention_mask=static_mask)
+            torch.cuda.synchronize()
+            graph = torch.cuda.CUDAGraph()
+            with torch.cuda.graph(graph):
+                static_out = self.model(input_ids=static_ids,
+                                        attention_mask=static_mask).last_hidden_state
+            self._graphs[bucket] = (graph, static_ids, static_mask, static_out)
+        graph, static_ids, static_mask, static_out = self._graphs[bucket]
+        static_ids.fill_(pad_id)
+        static_mask.zero_()
+        static_ids[:, :seq_len].copy_(input_ids)
+        static_mask[:, :seq_len].copy_(attention_mask)
+        graph.replay()
+        # clone: the next replay of this bucket overwrites static_out in place, and
+        # callers (notably the _encode_and_forward cache) hold on to the result
+        return static_out[:, :seq_len].clone()
+
+    @lru_cache(maxsize=4096)
+    def _encode_and_forward(self, sentence):
+        """
+        Tokenizes a single sentence and runs the model forward, caching the result by
+        sentence so repeated sentences only pay for the word-id lookup and slice.
+
+        Parameters:
+        -----------
+        sentence : str
+            The input sentence.
+
+        Returns:
+        --------
+        (word_ids, states) : tuple
+            The word ids of the encoding and the hidden states of the model.
+        """
+        encoded = self.tokenizer(sentence.split(" "), is_split_into_words=True,
+                                 return_tensors="pt", return_token_type_ids=False)
+        states = self.get_hidden_states(encoded)
+        # only keep the layers the pooling reads; caching the full hidden-state
+        # tuple would retain the whole stack per sentence
+        return tuple(encoded.word_ids()), states[-self.layer:]
+
+    def _pool_word_embedding(self, states, i, mask):
+        """
+        Pools the token slices selected by mask from the hidden states into one embedding.
+        """
+        if self.avg_layers:
+            # stack the per-layer slices and mean over layers and subword tokens at
+            # once; same math as the old cat+mean without the concat buffer
+            slices = [layer_states[i][mask] for layer_states in states[-self.layer:]]
+            return torch.stack(slices).mean(dim=(0, 1))
+        # with the truncated encoder, states[-1] is the full model's states[-layer]
+        return states[-1][i][mask].mean(dim=0)
+
     def get_word_embedding(self, sentence, word):
         """
         Takes a sentence and a word and returns the word embedding of that word in the sentence.
@@ -73,20 +202,74 @@ class ALBERTWordEmbeddings:
             The word embedding of the word in the sentence.
         """
         idx = sentence.split(" ").index(word)
-        if idx == -1:
-            return None
-        encoded = self.tokenizer(sentence, return_tensors="pt", return_token_type_ids=False)
-        token_ids_word = np.where(encoded.word_ids()[0] == idx)
-        # print(token_ids_word)
+        word_ids, states = self._encode_and_forward(sentence)
+        mask = torch.tensor([w == idx for w in word_ids],
+                            dtype=torch.bool, device=states[-1].device)
+        return self._pool_word_embedding(states, 0, mask)
+
+    def get_word_embeddings_batch(self, pairs):
+        """
+        Takes a list of (sentence, word) pairs and returns the word embeddings of all words
+        with a single padded forward pass through the model.
+
+        Parameters:
+        -----------
+        pairs : list
+            A list of (sentence, word) tuples.
+
+        Returns:
+        --------
+        embeddings : list
+            A list of word embeddings (torch.Tensor), one per input pair.
+        """
+        split_sentences = [sentence.split(" ") for sentence, _ in pairs]
+        word_idxs = [words.index(word) for words, (_, word) in zip(split_sentences, pairs)]
+        # pre-split input keeps word_ids() aligned with the split positions, so no
+        # string search against the tokenizer's own word segmentation is needed
+        encoded = self.tokenizer(split_sentences, is_split_into_words=True, padding=True,
+                                 truncation=True, return_tensors="pt", return_token_type_ids=False)
         states = self.get_hidden_states(encoded)
-        # print(states[-self.layer][0].shape)
-        if self.avg_layers:
-            embeddings_to_average = states[-self.layer:]
-            word_tokens_output = torch.cat([output[0][token_ids_word] for output in embeddings_to_average], dim=0)
-            word_embedding = word_tokens_output.mean(dim=0)
-        else:
-            output = states[-self.layer][0]
-            print(output[token_ids_word])
-            word_embedding = output[token_ids_word].mean(dim=0)
-        # print(word_embedding)
-        return word_embedding
\ No newline at end of file
+        embeddings = []
+        for i, idx in enumerate(word_idxs):
+            mask = torch.tensor([w == idx for w in encoded.word_ids(i)],
+                                dtype=torch.bool, device=states[-1].device)
+            embeddings.append(self._pool_word_embedding(states, i, mask))
+        return embeddings
+
+    def precompute_encodings(self, sentences, num_proc=None):
+        """
+        Tokenizes many sentences in parallel across cores with HF datasets and returns
+        the encodings ready for a single batched model forward.
+
+        Parameters:
+        -----------
+        sentences : list
+            A list of input sentences.
+        num_proc : int, optional
+            Number of worker processes for the tokenization, by default all cores.
+
+        Returns:
+        --------
+        encodings : dict
+            A dictionary with 'input_ids', 'attention_mask' and 'word_ids' lists,
+            one entry per sentence.
+        """
+        from datasets import Dataset
+
+        # close over the tokenizer only; capturing self would pickle the whole
+        # model into every num_proc worker (and fail outright for jit/compiled ones)
+        tokenizer = self.tokenizer
+
+        def tokenize(batch):
+            enc = tokenizer([text.split(" ") for text in batch['text']],
+                            is_split_into_words=True, padding=True, truncation=True,
+                            return_token_type_ids=False)
+            enc['word_ids'] = [enc.word_ids(i) for i in range(len(batch['text']))]
+            return enc
+
+        dataset = Dataset.from_dict({'text': sentences})
+        dataset = dataset.map(tokenize, batched=True, num_proc=num_proc or os.cpu_count(),
+                              remove_columns=['text'])
+        return {'input_ids': dataset['input_ids'],
+                'attention_mask': dataset['attention_mask'],
+                'word_ids': dataset['word_ids']}
\ No newline at end of file
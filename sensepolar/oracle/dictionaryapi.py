@@ -1,6 +1,15 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
 import requests
+from requests.adapters import HTTPAdapter, Retry
 from nltk.corpus import wordnet
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 class Dictionary:
     """
@@ -26,6 +35,11 @@ class Dictionary:
     get_antonyms(word): get the antonyms for a given word from the chosen dictionary
     get_definitions(word): get the definitions for a given word from the chosen dictionary
     get_examples(word): get the examples for a given word from the chosen dictionary
+    get_all(word): get definitions, examples, synonyms and antonyms with one request
+    get_synonyms_batch(words): get the synonyms for many words with parallel requests
+    get_antonyms_batch(words): get the antonyms for many words with parallel requests
+    get_definitions_batch(words): get the definitions for many words with parallel requests
+    get_examples_batch(words): get the examples for many words with parallel requests
     """
     def __init__(self, dictionary_id, api_key=None, source_lang='en_US'):
         """
@@ -36,6 +50,13 @@ class Dictionary:
         self.api_key = api_key
         self.source_lang = source_lang
         self.urls = self._get_urls()
+        # a pooled session reuses TCP+TLS connections across lookups instead of
+        # paying a fresh handshake per word
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32,
+                              max_retries=Retry(total=3, backoff_factor=0.3))
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
 
     def _get_urls(self):
         """
@@ -45,208 +66,245 @@ class Dictionary:
         if self.dictionary_id == 'dictionaryapi':
             urls['definitions'] = 'https://api.dictionaryapi.dev/api/v2/entries/{source_lang}/{word}'
             urls['examples'] = 'https://api.dictionaryapi.dev/api/v2/entries/{source_lang}/{word}'
+            urls['synonyms'] = 'https://api.dictionaryapi.dev/api/v2/entries/{source_lang}/{word}'
+            urls['antonyms'] = 'https://api.dictionaryapi.dev/api/v2/entries/{source_lang}/{word}'
         elif self.dictionary_id == 'oxford':
             urls['definitions'] = 'https://od-api.oxforddictionaries.com/api/v2/entries/{source_lang}/{word_id}'
             urls['examples'] = 'https://od-api.oxforddictionaries.com/api/v2/entries/{source_lang}/{word_id}/sentences'
+            urls['synonyms'] = 'https://od-api.oxforddictionaries.com/api/v2/entries/{source_lang}/{word_id}'
+            urls['antonyms'] = 'https://od-api.oxforddictionaries.com/api/v2/entries/{source_lang}/{word_id}'
         elif self.dictionary_id == 'wordnik':
             urls['definitions'] = 'https://api.wordnik.com/v4/word.json/{word}/definitions?limit=100&includeRelated=false&useCanonical=false&includeTags=false&api_key={api_key}'
             urls['examples'] = 'https://api.wordnik.com/v4/word.json/{word}/definitions?limit=100&includeRelated=false&useCanonical=false&includeTags=false&api_key={api_key}'
+            urls['synonyms'] = 'https://api.wordnik.com/v4/word.json/{word}/relatedWords?relationshipTypes=synonym&limitPerRelationshipType=100&useCanonical=false&api_key={api_key}'
+            urls['antonyms'] = 'https://api.wordnik.com/v4/word.json/{word}/relatedWords?relationshipTypes=antonym&limitPerRelationshipType=100&useCanonical=false&api_key={api_key}'
         elif self.dictionary_id == 'wordnet':
             urls['definitions'] = None
             urls['examples'] = None
+            urls['synonyms'] = None
+            urls['antonyms'] = None
         else:
             raise ValueError(f"Dictionary '{self.dictionary_id}' not supported")
         return urls
 
+    def _build_url(self, kind, word):
+        """
+        Build the request url of the given kind ('definitions', 'examples', 'synonyms'
+        or 'antonyms') for a word from the templates prepared by _get_urls.
+        """
+        template = self.urls.get(kind)
+        if template is None:
+            return None
+        return template.format(word=word, word_id=word, api_key=self.api_key,
+                               source_lang=self.source_lang)
+
     def _make_request(self, url):
         """
         Make a request to the chosen dictionary with the given url.
         """
-        if self.dictionary_id == 'wordnet':
-            params = {'s': url}
-            response = requests.get(self.urls['synonyms'], params=params)
-            if response.status_code == 200:
-                return response.text
-            else:
-                return None
+        headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'}
+        response = self._session.get(url, headers=headers)
+        if response.status_code == 200:
+            if orjson is not None:
+                return orjson.loads(response.content)
+            return response.json()
         else:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'}
-            response = requests.get(url, headers=headers)
-            if response.status_code == 200:
-                return response.json()
-            else:
-                return None
+            return None
 
 
-    def get_examples(self, word):
+    @lru_cache(maxsize=65536)
+    def _synsets(self, word):
         """
-        Get the definitions for a given word from the chosen dictionary.
+        Get the WordNet synsets for a given word, cached since the same anchor
+        word is queried from several methods.
+        """
+        return tuple(wordnet.synsets(word))
+
+    def _parse(self, response, kind):
+        """
+        Parse definitions, examples, synonyms or antonyms out of one response object
+        from the chosen dictionary; shared by the per-field getters and get_all.
         """
-        all_examples = []
-        if self.dictionary_id == 'wordnet':
-            for synset in wordnet.synsets(word):
-                # if len(synset.examples()) == 0:
-                #     continue
-                all_examples.append(synset.examples())
-            # print(len(all_examples),'all_examples', all_examples)
-            return all_examples
-        url = self.urls['examples'].format(word=word, api_key=self.api_key, source_lang=self.source_lang)
-        response = self._make_request(url)
         if response is None:
             return []
-        if self.dictionary_id == 'oxford':
-            if response and 'results' in response:
-                results = response['results']
-                for result in results:
-                    if 'lexicalEntries' in result:
-                        entries = result['lexicalEntries']
-                        for entry in entries:
-                            if 'sentences' in entry:
-                                sentences = entry['sentences']
-                                for sentence in sentences:
-                                    if 'text' in sentence:
-                                        all_examples.append(sentence['text'])
-
-        elif self.dictionary_id == 'dictionaryapi':
+        if self.dictionary_id == 'dictionaryapi':
             if not isinstance(response, list):
                 response = [response]
-            for entry in response:
-                meanings = entry.get("meanings", [])
-                for meaning in meanings:
-                    definitions = meaning.get("definitions", [])
-                    if definitions:
-                        for definition in definitions:
-                            example_uses = definition.get("example")
-                            if example_uses:
-                            #     example_uses = []
-                                all_examples.append(example_uses)  
-        elif self.dictionary_id == 'wordnik':
-            for entry in response:
-                if 'text' in entry.keys():
-                    definition = entry['text']
-                    examples = [example['text'] for example in entry['exampleUses'] if 'text' in example.keys()]
-                    # if examples:
-                    # #     examples = []
-                    all_examples.append(examples)
-        else:
-            raise ValueError(f"Dictionary '{self.dictionary_id}' not supported")
-        return all_examples
-        
+            if kind == 'examples':
+                return [
+                    definition['example']
+                    for entry in response
+                    for meaning in entry.get("meanings", [])
+                    for definition in meaning.get("definitions", [])
+                    if definition.get("example")
+                ]
+            if kind == 'definitions':
+                return [
+                    [definition.get("definition")]
+                    for entry in response
+                    for meaning in entry.get("meanings", [])
+                    for definition in meaning.get("definitions", [])
+                    if definition.get("example")
+                ]
+            return [
+                item
+                for entry in response
+                for meaning in entry.get("meanings", [])
+                for item in meaning.get(kind, [])
+            ]
+        if self.dictionary_id == 'oxford':
+            if kind == 'examples':
+                return [
+                    sentence['text']
+                    for result in response.get('results', [])
+                    for entry in result.get('lexicalEntries', [])
+                    for sentence in entry.get('sentences', [])
+                    if 'text' in sentence
+                ]
+            senses = [
+                sense
+                for result in response.get('results', [])
+                for lexical_entry in result.get('lexicalEntries', [])
+                for entry in lexical_entry.get('entries', [])
+                for sense in entry.get('senses', [])
+            ]
+            if kind == 'definitions':
+                return [[definition] for sense in senses
+                        for definition in sense.get('definitions', [])]
+            return [item.get('text') for sense in senses for item in sense.get(kind, [])]
+        if self.dictionary_id == 'wordnik':
+            if kind == 'examples':
+                return [
+                    [example['text'] for example in entry.get('exampleUses', []) if 'text' in example]
+                    for entry in response
+                    if 'text' in entry
+                ]
+            if kind == 'definitions':
+                return [[entry['text']] for entry in response if 'text' in entry]
+            relationship = kind[:-1]  # 'synonyms' -> 'synonym'
+            return [
+                word
+                for entry in response
+                if entry.get('relationshipType') == relationship
+                for word in entry.get('words', [])
+            ]
+        raise ValueError(f"Dictionary '{self.dictionary_id}' not supported")
 
+    @lru_cache(maxsize=65536)
+    def get_examples(self, word):
+        """
+        Get the definitions for a given word from the chosen dictionary.
+        """
+        if self.dictionary_id == 'wordnet':
+            return [synset.examples() for synset in self._synsets(word)]
+        response = self._make_request(self._build_url('examples', word))
+        return self._parse(response, 'examples')
 
+    @lru_cache(maxsize=65536)
     def get_definitions(self, word):
         """
         Get the examples for a given word from the chosen dictionary.
         """
-        all_definitions = []
         if self.dictionary_id == 'wordnet':
-            definitions = []
-            for synset in wordnet.synsets(word):
-                if len(synset.examples()) == 0:
-                    continue
-                all_definitions.append([synset.definition()])
-            return all_definitions
-        url = self.urls['definitions'].format(word=word, api_key=self.api_key, source_lang=self.source_lang)
-        response = self._make_request(url)
-        if response is None:
-            return []
-        if self.dictionary_id == 'dictionaryapi':
-            if not isinstance(response, list):
-                response = [response]
-            for entry in response:
-                meanings = entry.get("meanings", [])
-                for meaning in meanings:
-                    definitions = meaning.get("definitions", [])
-                    if definitions:
-                        for definition in definitions:
-                            example_uses = definition.get("example")
-                            if example_uses:
-                                all_definitions.append([definition.get("definition")])
-        elif self.dictionary_id == 'oxford':
-            entries = response.get('results', [{}])[0].get('lexicalEntries', [])
-            senses = []
-            for entry in entries:
-                senses += entry.get('entries', [{}])[0].get('senses', [])
-            definitions = []
-            for sense in senses:
-                definitions += sense.get('definitions', [])
-        elif self.dictionary_id == 'wordnik':
-            for entry in response:
-                if 'text' in entry.keys():
-                    definition = entry['text']
-                    examples = [example['text'] for example in entry.get('exampleUses', []) if example['text']]
-                    # if examples:
-                    all_definitions.append([definition])
-        return list(all_definitions)
-    
+            return [[synset.definition()] for synset in self._synsets(word)
+                    if len(synset.examples()) != 0]
+        response = self._make_request(self._build_url('definitions', word))
+        return self._parse(response, 'definitions')
+
+    @lru_cache(maxsize=65536)
     def get_synonyms(self, word):
         """
         Get the synonyms for a given word from the chosen dictionary.
         """
         if self.dictionary_id == 'wordnet':
             synonyms = []
-            for synset in wordnet.synsets(word):
+            for synset in self._synsets(word):
                 for lemma in synset.lemmas():
                     synonym = lemma.name().replace('_', ' ')
                     if synonym != word:
                         synonyms.append(synonym)
             return synonyms
-        url = self.urls['synonyms'].format(word=word, api_key=self.api_key, source_lang=self.source_lang)
-        response = self._make_request(url)
-        if response:
-                if self.dictionary_id == 'dictionaryapi':
-                    synonyms = response[0].get('meta', {}).get('syns', [])[0]
-                elif self.dictionary_id == 'oxford':
-                    synonyms = response.get('results', [])[0].get('lexicalEntries', [])[0].get('entries', [])[0].get('senses', [])[0].get('synonyms', [])
-                    synonyms = [synonym.get('text') for synonym in synonyms]
-                elif self.dictionary_id == 'wordnik':
-                    synonyms = response[0].get('words', [])
-                return synonyms
-        else:
+        response = self._make_request(self._build_url('synonyms', word))
+        if not response:
             return None
-    
+        return self._parse(response, 'synonyms')
+
+    @lru_cache(maxsize=65536)
+    def get_all(self, word):
+        """
+        Get the definitions, examples, synonyms and antonyms for a given word, sharing
+        one response across the fields wherever the backend allows it. dictionaryapi
+        serves all four from a single request; oxford and wordnik need one extra
+        request for the fields their entries payload does not carry.
+        """
+        if self.dictionary_id == 'wordnet':
+            return {'definitions': self.get_definitions(word),
+                    'examples': self.get_examples(word),
+                    'synonyms': self.get_synonyms(word),
+                    'antonyms': self.get_antonyms(word)}
+        response = self._make_request(self._build_url('definitions', word))
+        results = {kind: self._parse(response, kind)
+                   for kind in ('definitions', 'examples', 'synonyms', 'antonyms')}
+        # oxford examples live on the separate /sentences endpoint and wordnik
+        # synonyms/antonyms on relatedWords, so those come from their own getters
+        if self.dictionary_id == 'oxford':
+            results['examples'] = self.get_examples(word)
+        elif self.dictionary_id == 'wordnik':
+            results['synonyms'] = self.get_synonyms(word)
+            results['antonyms'] = self.get_antonyms(word)
+        return results
+
+    def _map_batch(self, func, words, max_workers):
+        """
+        Map a per-word lookup over many words with a thread pool; the lookups are
+        IO-bound so the threads overlap on network latency.
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(func, words))
+
+    def get_synonyms_batch(self, words, max_workers=16):
+        """
+        Get the synonyms for many words from the chosen dictionary in parallel.
+        """
+        return self._map_batch(self.get_synonyms, words, max_workers)
+
+    def get_antonyms_batch(self, words, max_workers=16):
+        """
+        Get the antonyms for many words from the chosen dictionary in parallel.
+        """
+        return self._map_batch(self.get_antonyms, words, max_workers)
+
+    def get_definitions_batch(self, words, max_workers=16):
+        """
+        Get the definitions for many words from the chosen dictionary in parallel.
+        """
+        return self._map_batch(self.get_definitions, words, max_workers)
+
+    def get_examples_batch(self, words, max_workers=16):
+        """
+        Get the examples for many words from the chosen dictionary in parallel.
+        """
+        return self._map_batch(self.get_examples, words, max_workers)
+
+    @lru_cache(maxsize=65536)
     def get_antonyms(self, word):
         """
         Get the antonyms for a given word from the chosen dictionary.
         """
         if self.dictionary_id == 'wordnet':
                 antonyms = []
-                for synset in wordnet.synsets(word):
+                for synset in self._synsets(word):
                     for lemma in synset.lemmas():
                         if lemma.antonyms():
                             antonyms.extend([antonym.name() for antonym in lemma.antonyms()])
                 if antonyms:
                     return antonyms
-        # url = self.urls['antonyms'].format(word=word, api_key=self.api_key, source_lang=self.source_lang)
-        response = None
+        url = self._build_url('antonyms', word)
+        response = self._make_request(url) if url else None
         if response:
-            if self.dictionary_id == 'dictionaryapi':
-                antonyms = response[0].get('meta', {}).get('ants', [])
-                if antonyms:
-                    return antonyms[0]
-            elif self.dictionary_id == 'oxford':
-                antonyms = []
-                results = response.get('results', [])
-                if results:
-                    lexical_entries = results[0].get('lexicalEntries', [])
-                    for entry in lexical_entries:
-                        entries = entry.get('entries', [])
-                        for entry in entries:
-                            senses = entry.get('senses', [])
-                            for sense in senses:
-                                antonym_entries = sense.get('antonyms', [])
-                                for antonym_entry in antonym_entries:
-                                    antonyms.append(antonym_entry.get('text'))
-                if antonyms:
-                    return antonyms
-            elif self.dictionary_id == 'wordnik':
-                antonyms = []
-                for result in response:
-                    if result.get('relationshipType') == 'antonym':
-                        words = result.get('words', [])
-                        antonyms.extend(words)
-                if antonyms:
-                    return antonyms
+            antonyms = self._parse(response, 'antonyms')
+            if antonyms:
+                return antonyms
         return None
     